@@ -1,9 +1,101 @@
+import sys
+
 from scipy.sparse import linalg
-import scipy.sparse as sps
+from scipy import signal
 import numpy as np
 import scipy as sp
 import model
 
+try:
+    from sksparse.cholmod import cholesky, CholmodNotPositiveDefiniteError
+except ImportError:
+    cholesky = None
+
+
+def _factorize(matrix):
+
+    """
+    Factorize a sparse matrix and return a function solving the system for
+    a given right-hand side. If scikit-sparse is installed, symmetric
+    positive definite matrices are factorized by Cholesky decomposition;
+    otherwise, or if the decomposition fails, LU decomposition is used.
+    """
+
+    if cholesky is not None:
+        try:
+            return cholesky(matrix.tocsc())
+        except CholmodNotPositiveDefiniteError:
+            pass
+
+    return linalg.factorized(matrix.tocsc())
+
+
+def _newmark(dsp, vlc, acc, frc, a1, a2, a3, Ki, c1, c2, c3, c4, c5, c6):
+
+    """
+    March the decoupled modal equations of motion in time with the Newmark
+    scheme. The coefficient arrays hold the diagonals of the modal matrices
+    and the response arrays are updated in place, starting from their first
+    column, which holds the initial conditions.
+
+    For each mode, the Newmark recursion x[j+1] = A x[j] + B f[j+1] of the
+    state x = (d, v, a) is a linear time-invariant filter, so the response
+    is evaluated over all time steps at once with "scipy.signal.lfilter".
+    The initial conditions are imposed through the initial filter delays,
+    which reproduce the free response A^(j+1) x[0].
+    """
+
+    for i in range(frc.shape[0]):
+        row = Ki[i]*np.array([a1[i], a2[i], a3[i]])
+
+        A = np.array([row, c1*row+[-c1, c2, c3], c4*row+[-c4, c5, c6]])
+        B = Ki[i]*np.array([[1], [c1], [c4]])
+
+        numerators, denominator = signal.ss2tf(A, B, A, B)
+
+        free = np.zeros((3, len(denominator)-1))
+        free[:, 0] = A.dot([dsp[i, 0], vlc[i, 0], acc[i, 0]])
+
+        for j in range(1, free.shape[1]):
+            free[:, j] = A.dot(free[:, j-1])
+
+        for state, numerator, response in zip([dsp, vlc, acc], numerators, free):
+            delays = np.convolve(denominator, response)[:len(response)]
+            state[i, 1:] = signal.lfilter(numerator, denominator, frc[i, 1:],
+                    zi=delays)[0]
+
+
+def _interpolate(x, xp, fp):
+
+    """
+    Linearly interpolate each row of fp, sampled at the increasing points
+    xp, at the points x. Values outside the range of xp are clamped to the
+    end values, as in "numpy.interp".
+    """
+
+    index = np.clip(np.searchsorted(xp, x, side='right'), 1, len(xp)-1)
+    width = xp[index]-xp[index-1]
+
+    # Intervals of zero width only occur where x is clamped, at a single
+    # sample or at repeated end points, and take the value on that side.
+
+    weight = (x >= xp[index]).astype(float)
+    np.divide(x-xp[index-1], width, out=weight, where=width > 0)
+    weight = np.clip(weight, 0, 1)
+
+    # Gathering the bracketing values allocates the only two full-size
+    # arrays, as floats so that integer histories can be interpolated, and
+    # the remaining operations are carried out in place.
+
+    lower = fp[:, index-1].astype(float, copy=False)
+    upper = fp[:, index].astype(float, copy=False)
+
+    np.subtract(upper, lower, out=upper)
+    np.multiply(upper, weight, out=upper)
+    np.add(lower, upper, out=lower)
+
+    return lower
+
 
 class Static:
 
@@ -15,6 +107,14 @@ class Static:
     model: Model
         The model to be analysed.
 
+    Attributes
+    ----------
+    stiffness
+        The assembled stiffness matrix, reused while the model is unchanged.
+    solver
+        The factorization of the free stiffness partition, which can be
+        reused to solve for further load vectors.
+
     Methods
     -------
     submit()
@@ -23,10 +123,14 @@ class Static:
 
     def __init__(self, model):
         self.model = model
+        self.stiffness = None
+        self.solver = None
 
     def submit(self):
 
-        self.stiffness = model.Stiffness(self.model)
+        if self.stiffness is None or not self.stiffness.isCurrent():
+            self.stiffness = model.Stiffness(self.model)
+            self.solver = None
 
         Kff = self.stiffness.getPartitionFF()
         Kfr = self.stiffness.getPartitionFR()
@@ -40,11 +144,15 @@ class Static:
         loads = np.array([load[1] for load in self.model.loads])
         Ff = self.model.Sp.dot(loads)
         Ur = np.zeros(len(rdof))
-        Uf = sps.linalg.inv(Kff).dot(Ff-Kfr.dot(Ur))
 
-        self.displacement = np.zeros((len(ndof), 1))
-        self.displacement[rdof, 0] = Ur
-        self.displacement[fdof, 0] = Uf
+        if self.solver is None:
+            self.solver = _factorize(Kff)
+
+        Uf = self.solver(Ff-Kfr.dot(Ur))
+
+        self.displacement = np.zeros(len(ndof))
+        self.displacement[rdof] = Ur
+        self.displacement[fdof] = Uf
 
 
 
@@ -69,8 +177,17 @@ class Modal:
         The number of eigenvalues to be extracted.
     normalizationMethod
         The mode shapes normalization method.
-    returnShapes
+    returnModeShapes
         Flag for returning the mode shapes.
+    stiffness
+        The assembled stiffness matrix, reused while the model is unchanged.
+    mass
+        The assembled mass matrix, reused while the model is unchanged.
+    inverse
+        The inverse of the shifted operator, applied through its Cholesky or
+        LU factorization, reused while the model and sigma are unchanged.
+    shift
+        The sigma value the inverse of the shifted operator refers to.
 
     Methods
     -------
@@ -96,6 +213,10 @@ class Modal:
         self.numberOfEigenvalues = 1
         self.normalizationMethod = 'Mass'
         self.returnModeShapes = True
+        self.stiffness = None
+        self.mass = None
+        self.inverse = None
+        self.shift = None
 
 
     def setSigmaValue(self, sigma):
@@ -106,12 +227,17 @@ class Modal:
 
         Parameters
         ----------
-        sigma: real
+        sigma: real, non-negative
             The sigma value.
+
+        Raises
+        ------
+        TypeError
+            If a negative sigma value is specified.
         """
 
-        if sigma <= 0:
-            error = 'Sigma must be positive and non-zero'
+        if sigma < 0:
+            error = 'Sigma must be non-negative.'
             raise TypeError(error)
 
         self.sigma = sigma
@@ -183,7 +309,9 @@ class Modal:
     def setReturnModeShapes(self, value):
 
         """
-        Specify if mode shapes are returned in addition to eigenvalues.
+        Specify if mode shapes are returned in addition to eigenvalues. If
+        not, the Ritz vectors are not recovered by ARPACK, the mode shapes
+        are neither filtered nor normalized and the modes attribute is None.
 
         Parameters
         ----------
@@ -205,44 +333,61 @@ class Modal:
 
     def submit(self):
 
-        stiffness = model.Stiffness(self.model).getPartitionFF()
-        mass = model.Mass(self.model).getPartitionFF()
+        if self.stiffness is None or not self.stiffness.isCurrent():
+            self.stiffness = model.Stiffness(self.model)
+            self.inverse = None
+
+        if self.mass is None or not self.mass.isCurrent():
+            self.mass = model.Mass(self.model)
+            self.inverse = None
+
+        stiffness = self.stiffness.getPartitionFF()
+        mass = self.mass.getPartitionFF()
+
+        # Factorize the shifted operator once, so that all ARPACK iterations
+        # and later submissions with the same sigma reuse the same
+        # decomposition in shift-invert mode.
+
+        if self.inverse is None or self.shift != self.sigma:
+            solve = _factorize(stiffness-self.sigma*mass)
+            self.inverse = linalg.LinearOperator(stiffness.shape,
+                    matvec=solve, dtype=stiffness.dtype)
+            self.shift = self.sigma
 
         values = linalg.eigsh(stiffness, k=self.numberOfEigenvalues,
-                M=mass, sigma=self.sigma, tol=self.tolerance,
-                return_eigenvectors=self.returnModeShapes)
+                M=mass, sigma=self.sigma, which='LM', OPinv=self.inverse,
+                tol=self.tolerance, return_eigenvectors=self.returnModeShapes)
 
         if self.returnModeShapes:
-            values, vectors = values[0], values[1]
+            values, vectors = values
+        else:
+            vectors = None
+
+        mask = values >= 0
+
+        if not np.all(mask):
+            values = values[mask]
 
-            if np.any(values<0):
-                index = np.where(values>=0)
-                values, vectors = values[index[0]], vectors[:, index[0]]
+            if vectors is not None:
+                vectors = vectors[:, mask]
 
-                warning = '{} negative values found.\n'
-                syst.stdout.write(warning.format(str(len(index[0]))))
+            warning = '{} negative values found.\n'
+            sys.stdout.write(warning.format(np.count_nonzero(~mask)))
 
+        if vectors is not None:
             if self.normalizationMethod == 'Mass':
-                for vector in vectors.T:
-                    scaling = np.sqrt(vector.dot(mass.toarray().dot(vector)))
-                    vector /= scaling
+                products = mass.dot(vectors)
+                scaling = np.sqrt(np.einsum('ij,ij->j', vectors, products))
             else:
                 scaling = np.max(np.abs(vectors), 0)
-                vectors /= scaling
 
-            # check if vectors has more than one columns.
-            # If not, vectors.shape[1] will raise an error
-            self.modes = np.zeros((len(self.model.ndof), vectors.shape[1]))
-            self.modes[list(self.model.fdof.values()), :] = vectors
-            self.modes[list(self.model.rdof.values()), :] = 0
+            vectors *= 1/scaling
+
+            self.modes = np.empty((len(self.model.ndof), vectors.shape[1]))
+            self.modes[list(self.model.fdof.values())] = vectors
+            self.modes[list(self.model.rdof.values())] = 0
         else:
             self.modes = None
-            if np.any(values<0):
-                index = np.where(values>=0)
-                values = values[index[0]]
-
-                warning = '{} negative values found.\n'
-                syst.stdout.write(warning.format(str(len(index[0]))))
 
         self.frequencies = np.sqrt(values)/(2*np.pi)
 
@@ -259,12 +404,22 @@ class Dynamics(object):
     model: Model
         The model to be analysed.
 
+    Attributes
+    ----------
+    modal
+        The modal analysis providing the modes used for superposition, which
+        keeps its assembled matrices between submissions.
+    precision
+        The floating-point precision of the stored modal response.
+
     Methods
     -------
     setTimePeriod(period)
         Specify the simulation time period.
     setIncrementSize(size)
         Specify the solution time increment.
+    setPrecision(precision)
+        Specify the floating-point precision of the stored response.
     submit()
         Submit analysis.
     """
@@ -274,6 +429,8 @@ class Dynamics(object):
         self.model = model
         self.timePeriod = 1
         self.incrementSize = 0.1
+        self.precision = 'double'
+        self.modal = Modal(model)
 
 
     def setTimePeriod(self, period):
@@ -320,11 +477,37 @@ class Dynamics(object):
         self.incrementSize = size
 
 
+    def setPrecision(self, precision):
+
+        """
+        Specify the floating-point precision of the stored modal response.
+        The time integration is always carried out in double precision,
+        since the recursion is sensitive to rounding of its coefficients,
+        while single precision halves the memory of the response histories.
+
+        Parameters
+        ----------
+        precision: {'single', 'double'}
+            The precision of the displacement, velocity and acceleration.
+
+        Raises
+        ------
+        TypeError
+            If an invalid precision is specified.
+        """
+
+        if precision.lower() not in ['single', 'double']:
+            error = 'Precision must be either "{}" or "{}".'
+            raise TypeError(error.format('Single', 'Double'))
+
+        self.precision = precision.lower()
+
+
 
 
     def submit(self):
 
-        modal = Modal(self.model)
+        modal = self.modal
         modal.setNumberOfEigenvalues(10)
         modal.submit()
 
@@ -343,30 +526,47 @@ class Dynamics(object):
         a, b = self.model.alpha, self.model.beta
         damping = a*1/(4*np.pi*frequencies)+b*np.pi*frequencies
 
-        dsp = np.zeros((len(frequencies), len(time)))
-        vlc = np.zeros((len(frequencies), len(time)))
-        acc = np.zeros((len(frequencies), len(time)))
+        dtype = np.float32 if self.precision == 'single' else np.float64
 
-        K = (np.diag(frequencies)*2*np.pi)**2
-        C = np.diag(frequencies)*2*np.pi*2*damping
-        M = np.eye(len(frequencies))
+        dsp = np.zeros((len(frequencies), len(time)), dtype=dtype)
+        vlc = np.zeros((len(frequencies), len(time)), dtype=dtype)
+        acc = np.zeros((len(frequencies), len(time)), dtype=dtype)
+
+        #  Diagonals of the modal stiffness, damping and mass matrices
+
+        K = (frequencies*2*np.pi)**2
+        C = frequencies*2*np.pi*2*damping
+        M = np.ones(len(frequencies))
 
         #  Construct modal force vector
 
         loads = np.zeros((len(self.model.loads), len(time)))
 
+        # Interpolate all loads sharing the same time instants at once
+
+        groups = {}
+
         for i, load in enumerate(self.model.loads):
-            loads[i] = np.interp(time, load[0], load[1])
+            groups.setdefault(load[0].tobytes(), []).append(i)
 
-        frc = modes.T.dot(self.model.Sp).dot(loads)
+        for indices in groups.values():
+            instants = self.model.loads[indices[0]][0]
+            amplitudes = np.array([self.model.loads[i][1] for i in indices])
+            loads[indices] = _interpolate(time, instants, amplitudes)
 
-        efrc = -C.dot(vlc[:, 0])-K.dot(dsp[:, 0])
-        acc[:, 0] = np.linalg.solve(M, frc[:, 0]+efrc)
+        # Project the modes on the loaded degrees of freedom first, since the
+        # load selection matrix has far fewer columns than rows.
+
+        fdof = list(self.model.fdof.values())
+        frc = self.model.Sp.T.dot(modes[fdof]).T.dot(loads)
+
+        efrc = -C*vlc[:, 0]-K*dsp[:, 0]
+        acc[:, 0] = (frc[:, 0]+efrc)/M
 
         a1 = 1/(beta*step**2)*M+gamma/(beta*step)*C
         a2 = 1/(beta*step)*M+(gamma/beta-1)*C
         a3 = (1/(2*beta)-1)*M+step*(gamma/(2*beta)-1)*C
-        Ki = np.linalg.inv(K+a1)
+        Ki = 1/(K+a1)
 
         c1 = gamma/(beta*step)
         c2 = 1-gamma/beta
@@ -375,13 +575,7 @@ class Dynamics(object):
         c5 = -1/(beta*step)
         c6 = -(1/(2*beta)-1)
 
-        for j in range(len(time)-1):
-
-            efrc = a1.dot(dsp[:, j])+a2.dot(vlc[:, j])+a3.dot(acc[:, j])
-            dsp[:, j+1] = Ki.dot(frc[:, j+1]+efrc)
-
-            vlc[:, j+1] = c1*(dsp[:, j+1]-dsp[:, j])+c2*vlc[:, j]+c3*acc[:, j]
-            acc[:, j+1] = c4*(dsp[:, j+1]-dsp[:, j])+c5*vlc[:, j]+c6*acc[:, j]
+        _newmark(dsp, vlc, acc, frc, a1, a2, a3, Ki, c1, c2, c3, c4, c5, c6)
 
         self.modes = modes
         self.frequencies = frequencies
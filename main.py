@@ -491,7 +491,7 @@ def submit(job, pipe=sys.stdout.write):
                 ipoints = elements[elabel].getIntegrationPoints()
 
                 edofs = elements[elabel].getNodeDegreesOfFreedom()
-                disp = static.displacement[edofs]
+                disp = static.displacement[edofs, np.newaxis]
                 element = elements[elabel].getType()
 
                 strain = element.getStrain(ncoords, disp, ipoints, r1, r2)
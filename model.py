@@ -199,8 +199,11 @@ class Load:
                     model.loads.append(function)
                     model.ldof[(label, dic[dof])] = int(node.ndof[dic[dof]])
 
-        model.Sp = np.zeros((len(model.ndof), len(model.ldof)))
-        model.Sp[list(model.ldof.values()), range(len(model.ldof))] = 1
+        rows = list(model.ldof.values())
+        cols = list(range(len(model.ldof)))
+        shape = (len(model.ndof), len(model.ldof))
+
+        model.Sp = sps.csr_matrix((np.ones(len(rows)), (rows, cols)), shape)
         model.Sp = model.Sp[list(model.fdof.values())]
 
 
@@ -247,6 +250,7 @@ class Constraint:
                     model.fdof.pop((label, dic[dof]))
 
         model.Sp = model.Sp[list(model.fdof.values())]
+        model.version += 1
 
 
     def addSpring(self, labels, dofs, values):
@@ -265,6 +269,8 @@ class Constraint:
                 self.model.springs[2].append(int(node.ndof[dic[dof]]))
                 self.model.springs[3].append(value)
 
+        self.model.version += 1
+
 
     def addMass(self, labels, dofs, value):
 
@@ -282,6 +288,8 @@ class Constraint:
                 self.model.masses[2].append(int(node.ndof[dic[dof]]))
                 self.model.masses[3].append(value)
 
+        self.model.version += 1
+
 
 
 
@@ -300,6 +308,11 @@ class Model:
 
         self.springs = [[], [], [], []]
         self.masses = [[], [], [], []]
+
+        # Counter bumped whenever constraints, springs or masses change, so
+        # that assembled matrices can tell whether they are outdated.
+
+        self.version = 0
     
         elementCounter = it.count(0)
         nodeCounter = it.count(0)
@@ -320,7 +333,7 @@ class Model:
                 self.ndof[(node.label, dof)] = num
                 self.fdof[(node.label, dof)] = num
 
-        self.Sp = np.zeros((len(self.fdof), len(self.ldof)))
+        self.Sp = sps.csr_matrix((len(self.fdof), len(self.ldof)))
 
         self.constraints = Constraint(self)
 
@@ -433,6 +446,10 @@ class Matrix(abc.ABC):
     def __init__(self, model):
 
         self.model = model
+        self.version = model.version
+        self.partitions = {}
+        self.compressed = None
+
         m = len(self.model.ndof)
         self.full = sps.csr_matrix((int(m), int(m)), dtype=float)
 
@@ -466,34 +483,54 @@ class Matrix(abc.ABC):
             self.full += sps.csr_matrix((k, (j, j)), shape=(m, m))
 
 
+    def isCurrent(self):
+
+        """ Check whether the matrix is consistent with the model state. """
+
+        return self.version == self.model.version
+
+
+    def getPartition(self, rows, columns):
+
+        """ Extract and memoize a partition given the dof sets' names. """
+
+        key = (rows, columns)
+
+        if key not in self.partitions:
+
+            # Convert to CSC only once, for slicing the columns of all
+            # partitions, and return partitions in CSC format, as required
+            # for their factorization.
+
+            if self.compressed is None:
+                self.compressed = self.full.tocsc()
+
+            rdof = list(getattr(self.model, rows).values())
+            cdof = list(getattr(self.model, columns).values())
+            partition = self.compressed[:, cdof].tocsr()[rdof, :].tocsc()
+            self.partitions[key] = partition
+
+        return self.partitions[key]
+
+
     def getPartitionFF(self):
 
-        fdof = list(self.model.fdof.values())
-        ff = self.full.tocsc()[:, fdof].tocsr()[fdof, :].tocsc()
-        return ff
+        return self.getPartition('fdof', 'fdof')
 
 
     def getPartitionFR(self):
 
-        fdof = list(self.model.fdof.values())
-        rdof = list(self.model.rdof.values())
-        fr = self.full.tocsc()[:, rdof].tocsr()[fdof, :].tocsc()
-        return fr
+        return self.getPartition('fdof', 'rdof')
 
 
     def getPartitionRF(self):
 
-        fdof = list(self.model.fdof.values())
-        rdof = list(self.model.rdof.values())
-        rf = self.full.tocsc()[:, fdof].tocsr()[rdof, :].tocsc()
-        return rf
+        return self.getPartition('rdof', 'fdof')
 
 
     def getPartitionRR(self):
 
-        rdof = list(self.model.rdof.values())
-        rr = self.full.tocsc()[:, rdof].tocsr()[rdof, :].tocsc()
-        return rr
+        return self.getPartition('rdof', 'rdof')
         
         
 class Stiffness(Matrix):
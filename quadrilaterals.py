@@ -192,7 +192,7 @@ class Quadrilateral(abc.ABC):
 
         jacobian = self.getJacobian(ncoords, r1, r2)
         derivatives = self.getShapeFunctionsDerivatives(r1, r2)
-        data = np.linalg.inv(jacobian).dot(derivatives).T
+        data = np.linalg.solve(jacobian, derivatives).T
         deformation = np.zeros((3, self.degrees))
 
         cols = np.arange(0, self.degrees, 2)